@@ -14,8 +14,13 @@ Usage:
 import asyncio
 import logging
 import argparse
+import os
+import re
 import sys
+from collections import defaultdict
+from operator import itemgetter
 from typing import Union, Optional, List, Dict, Any, Tuple
+from model import openrouter
 from model.openrouter import generate_summary_with_ai
 from utils.config import (
     TELEGRAM_API_ID, 
@@ -25,10 +30,11 @@ from utils.config import (
     DEFAULT_MODEL,
     DEFAULT_MESSAGE_LIMIT
 )
+from utils import llm_cache
 from utils.prompt_loader import get_prompt
 from utils.formatters import (
     format_results,
-    write_output
+    write_output_async
 )
 from model.message_analyzer import TelegramMessageAnalyzer
 
@@ -39,6 +45,31 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Maximum number of concurrent LLM calls when generating summaries
+LLM_MAX_ASYNC = int(os.getenv("LLM_MAX_ASYNC", "6"))
+
+# Matches trader names in forwarded bot messages like "💰TraderName【...】"
+_TRADER_RE = re.compile(r"💰\s*([^【\n\r]+?)(?:【|$)", re.MULTILINE)
+
+# Chats larger than this many messages are summarized hierarchically
+# (map-reduce) instead of through one mega-prompt
+SUMMARY_CHUNK_SIZE = int(os.getenv("SUMMARY_CHUNK_SIZE", "50"))
+
+# Fallback prompts used when data/prompts has no overall/chunk/reduce templates
+_OVERALL_PROMPT_FALLBACK = (
+    "Summarize the following Telegram conversation between {participants}. "
+    "Cover the key topics, decisions and who said what. Be concise.\n\n{messages}"
+)
+_CHUNK_PROMPT_FALLBACK = (
+    "Summarize the following portion of a Telegram conversation. Keep the "
+    "key topics, decisions and who said what. Be concise.\n\n{messages}"
+)
+_REDUCE_PROMPT_FALLBACK = (
+    "The following are summaries of consecutive parts of one Telegram "
+    "conversation, in order. Merge them into a single coherent overall "
+    "summary without repeating yourself.\n\n{messages}"
+)
+
 
 
 async def analyze_messages(
@@ -49,11 +80,12 @@ async def analyze_messages(
     target_users: Optional[List[str]] = None, 
     limit: int = 200, 
     model: str = DEFAULT_MODEL,
-    unread_only: bool = False
+    unread_only: bool = False,
+    stream: bool = False
 ) -> Dict[str, Any]:
     """
     Fetch and analyze messages from a Telegram chat, with optional user filtering.
-    
+
     Args:
         api_id: Telegram API ID
         api_hash: Telegram API Hash
@@ -63,7 +95,8 @@ async def analyze_messages(
         limit: Maximum number of messages to fetch
         model: OpenRouter model to use for summarization
         unread_only: Whether to fetch only unread messages
-        
+        stream: Whether to stream the overall summary to stdout as it is generated
+
     Returns:
         Analysis results including conversation structure and summaries
     """
@@ -87,19 +120,26 @@ async def analyze_messages(
             # Extract messages from the unread data
             messages = unread_data["unread_messages"]
             chat_title = unread_data["chat_title"]
+
+            total_count = len(messages)
+            filtered_messages, extended_messages = filter_and_extend_messages(messages, target_users)
         else:
-            # Fetch regular messages
-            messages, chat_title = await analyzer.fetch_messages(chat_id, limit=limit)
-            
-            if not messages:
+            # Stream messages straight into the aggregator so the raw window
+            # is consumed in a single pass instead of being copied around
+            chat_title = await analyzer.get_chat_title(chat_id)
+            aggregator = _MessageAggregator(target_users)
+            async for msg in analyzer.iter_messages(chat_id, limit=limit):
+                aggregator.add(msg)
+
+            if aggregator.total == 0:
                 return {
                     "status": "error",
                     "message": "No messages found in the specified chat"
                 }
-        
-        # Process and filter messages
-        filtered_messages, extended_messages = filter_and_extend_messages(messages, target_users)
-        
+
+            total_count = aggregator.total
+            filtered_messages, extended_messages = aggregator.finalize()
+
         # Organize messages by participant
         participants = organize_by_participant(extended_messages)
         
@@ -110,9 +150,10 @@ async def analyze_messages(
         if extended_messages:
             # Generate summaries
             overall_summary, participant_summaries = await generate_summaries(
-                extended_messages, 
-                participants, 
-                model
+                extended_messages,
+                participants,
+                model,
+                stream=stream
             )
         
         # Compile results
@@ -121,7 +162,7 @@ async def analyze_messages(
             "chat_title": chat_title,
             "target_users": target_users,
             "message_count": {
-                "total": len(messages),
+                "total": total_count,
                 "filtered": len(filtered_messages),
                 "with_context": len(extended_messages)
             },
@@ -138,52 +179,87 @@ async def analyze_messages(
         
         return results
 
+class _MessageAggregator:
+    """
+    Single-pass accumulator for a stream of messages.
+
+    Messages are classified as target or potential context as they arrive,
+    so the full message window never needs to be re-scanned afterwards.
+    """
+
+    def __init__(self, target_users: Optional[List[str]] = None):
+        # Convert usernames to lowercase for case-insensitive matching
+        # ('@' only ever appears as a prefix, so lstrip suffices)
+        self.target_set = frozenset(
+            u.lower().lstrip('@') if isinstance(u, str) else str(u) for u in target_users
+        ) if target_users else None
+        self.by_id: Dict[int, Dict[str, Any]] = {}
+        self.filtered: List[Dict[str, Any]] = []
+        self._filtered_ids = set()
+        self._context_ids = set()
+
+    @property
+    def total(self) -> int:
+        """Number of messages consumed so far."""
+        return len(self.by_id)
+
+    def add(self, msg: Dict[str, Any]) -> None:
+        """Consume one message, classifying it against the target users."""
+        self.by_id[msg["id"]] = msg
+        if self.target_set is None:
+            self.filtered.append(msg)
+            return
+
+        # Prefer the name normalized once at ingestion; only recompute for
+        # dicts produced outside the analyzer
+        sender_name = msg.get("_sn_norm")
+        if sender_name is None:
+            sender_name = msg.get("sender_name", "").lower().lstrip('@')
+        sender_id = str(msg.get("sender_id", ""))
+        if sender_name in self.target_set or sender_id in self.target_set:
+            self.filtered.append(msg)
+            self._filtered_ids.add(msg["id"])
+            if msg.get("is_reply") and msg.get("reply_to_msg_id"):
+                self._context_ids.add(msg["reply_to_msg_id"])
+
+    def finalize(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Resolve reply context against the id index.
+
+        Returns:
+            Tuple of (filtered messages, extended messages with context)
+        """
+        if self.target_set is None:
+            return self.filtered, self.filtered
+
+        context_messages = [
+            self.by_id[msg_id]
+            for msg_id in self._context_ids - self._filtered_ids
+            if msg_id in self.by_id
+        ]
+        return self.filtered, self.filtered + context_messages
+
 def filter_and_extend_messages(
-    messages: List[Dict[str, Any]], 
+    messages: List[Dict[str, Any]],
     target_users: Optional[List[str]]
 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
     Filter messages by target users and extend with context messages.
-    
+
     Args:
         messages: List of all messages
         target_users: Optional list of target usernames or IDs
-        
+
     Returns:
         Tuple of (filtered messages, extended messages with context)
     """
     if not target_users:
         return messages, messages
-    
-    # Convert usernames to lowercase for case-insensitive matching
-    target_users_lower = [u.lower().strip('@') if isinstance(u, str) else str(u) for u in target_users]
-    
-    # Filter messages from target users
-    filtered_messages = []
+
+    aggregator = _MessageAggregator(target_users)
     for msg in messages:
-        sender_name = msg.get("sender_name", "").lower().strip('@')
-        sender_id = str(msg.get("sender_id", ""))
-        
-        if sender_name in target_users_lower or sender_id in target_users_lower:
-            filtered_messages.append(msg)
-    
-    # Extend filtered_messages with context messages (replies to target users)
-    # Create a set of message IDs that are referenced in replies
-    context_message_ids = {
-        msg.get("reply_to_msg_id") 
-        for msg in filtered_messages 
-        if msg.get("is_reply") and msg.get("reply_to_msg_id")
-    }
-    
-    # Add context messages from the original messages list
-    filtered_ids = {msg["id"] for msg in filtered_messages}
-    context_messages = [
-        msg for msg in messages 
-        if msg["id"] in context_message_ids and msg["id"] not in filtered_ids
-    ]
-    
-    extended_messages = filtered_messages + context_messages
-    return filtered_messages, extended_messages
+        aggregator.add(msg)
+    return aggregator.finalize()
 
 def organize_by_participant(messages: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
     """
@@ -195,13 +271,10 @@ def organize_by_participant(messages: List[Dict[str, Any]]) -> Dict[str, List[Di
     Returns:
         Dictionary mapping participant names to their messages
     """
-    participants = {}
+    participants = defaultdict(list)
     for msg in messages:
-        sender_name = msg.get("sender_name", "Unknown")
-        if sender_name not in participants:
-            participants[sender_name] = []
-        participants[sender_name].append(msg)
-    return participants
+        participants[msg.get("sender_name", "Unknown")].append(msg)
+    return dict(participants)
 
 def get_date_range(messages: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
     """
@@ -215,146 +288,275 @@ def get_date_range(messages: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
     """
     if not messages:
         return {"earliest": None, "latest": None}
-    
-    # Messages are typically in reverse chronological order
+
+    # Order-agnostic: messages may be re-sorted in place downstream
     return {
-        "earliest": messages[-1]["timestamp"] if messages else None,
-        "latest": messages[0]["timestamp"] if messages else None
+        "earliest": min(messages, key=itemgetter("datetime"))["timestamp"],
+        "latest": max(messages, key=itemgetter("datetime"))["timestamp"]
     }
 
+def _format_all_messages(extended_messages: List[Dict[str, Any]]) -> str:
+    """
+    Sort messages chronologically in place and render them as prompt text.
+
+    Pure CPU work; run via asyncio.to_thread so the event loop stays free
+    for in-flight LLM responses.
+
+    Args:
+        extended_messages: List of message dictionaries
+
+    Returns:
+        Newline-joined formatted message lines, oldest first
+    """
+    # The _ord arrival counter (newest first) sorts on ints instead of
+    # datetime strings
+    extended_messages.sort(key=itemgetter("_ord"), reverse=True)
+    return "\n".join(_format_message(msg) for msg in extended_messages)
+
+def _extract_trader_names(extended_messages: List[Dict[str, Any]]) -> List[str]:
+    """
+    Extract trader names from messages in one regex pass per message.
+
+    Args:
+        extended_messages: List of message dictionaries
+
+    Returns:
+        Sorted list of unique trader names
+    """
+    return sorted({
+        name.strip()
+        for msg in extended_messages
+        for name in _TRADER_RE.findall(msg.get("text", ""))
+        if name.strip()
+    })
+
+def _format_message(msg: Dict[str, Any]) -> str:
+    """
+    Render a single message as a prompt line with timestamp and sender.
+
+    Args:
+        msg: Message dictionary
+
+    Returns:
+        Formatted message line
+    """
+    if msg.get("is_forwarded", False):
+        forwarded_source = msg.get("forwarded_from", "Unknown Source")
+        return f"[{msg['timestamp']}] {msg['sender_name']} shared content originally by {forwarded_source}: {msg['text']}"
+    return f"[{msg['timestamp']}] {msg['sender_name']}: {msg['text']}"
+
+async def _bounded(semaphore: asyncio.Semaphore, func, *args, **kwargs) -> str:
+    """
+    Call an async function while holding the shared concurrency semaphore.
+
+    Takes the callable rather than a coroutine object: the coroutine is
+    only created once a slot is acquired, so tasks cancelled while still
+    queued on the semaphore never leave an un-awaited coroutine behind.
+
+    Args:
+        semaphore: Semaphore bounding the number of in-flight LLM calls
+        func: Async callable to invoke once a slot is available
+        *args: Positional arguments passed through to func
+        **kwargs: Keyword arguments passed through to func
+
+    Returns:
+        The call's result
+    """
+    async with semaphore:
+        return await func(*args, **kwargs)
+
+async def _map_reduce_overall(
+    extended_messages: List[Dict[str, Any]],
+    model: str,
+    semaphore: asyncio.Semaphore
+) -> str:
+    """
+    Summarize a large chat hierarchically: summarize fixed-size chunks
+    concurrently (map), then combine the partial summaries in one final
+    call (reduce). N short concurrent prompts finish in roughly
+    max(latency) instead of one slow mega-prompt.
+
+    Args:
+        extended_messages: Chronologically sorted message dictionaries
+        model: OpenRouter model to use for summarization
+        semaphore: Shared semaphore bounding concurrent LLM calls
+
+    Returns:
+        The reduced overall summary
+    """
+    try:
+        chunk_prompt = get_prompt("chunk_prompt", _CHUNK_PROMPT_FALLBACK)
+    except Exception:
+        chunk_prompt = _CHUNK_PROMPT_FALLBACK
+    try:
+        reduce_prompt = get_prompt("reduce_prompt", _REDUCE_PROMPT_FALLBACK)
+    except Exception:
+        reduce_prompt = _REDUCE_PROMPT_FALLBACK
+
+    chunks = [
+        extended_messages[i:i + SUMMARY_CHUNK_SIZE]
+        for i in range(0, len(extended_messages), SUMMARY_CHUNK_SIZE)
+    ]
+    logger.info(f"Map-reduce summary: {len(extended_messages)} messages in {len(chunks)} chunks")
+
+    partials = await asyncio.gather(*[
+        _bounded(
+            semaphore,
+            generate_summary_with_ai,
+            "\n".join(_format_message(msg) for msg in chunk),
+            model,
+            chunk_prompt
+        )
+        for chunk in chunks
+    ])
+
+    return await _bounded(
+        semaphore, generate_summary_with_ai, "\n\n".join(partials), model, reduce_prompt
+    )
+
 async def generate_summaries(
     extended_messages: List[Dict[str, Any]],
     participants: Dict[str, List[Dict[str, Any]]],
-    model: str
+    model: str,
+    stream: bool = False
 ) -> Tuple[Optional[str], Dict[str, str]]:
     """
-    Generate overall and participant summaries in a single API call to avoid rate limiting.
-    
+    Generate overall and per-participant summaries as concurrent API calls.
+
+    One coroutine is dispatched for the overall summary plus one per
+    participant, all bounded by a shared semaphore (LLM_MAX_ASYNC) so the
+    network latency of the individual calls overlaps without flooding
+    OpenRouter.
+
     Args:
         extended_messages: List of all messages with context
         participants: Dictionary mapping participant names to their messages
         model: OpenRouter model to use for summarization
-        
+        stream: Stream the overall summary to stdout as tokens arrive
+
     Returns:
         Tuple of (overall summary, participant summaries dictionary)
     """
-    # Format all messages with timestamps and participant names
-    all_formatted_messages = []
-    for msg in sorted(extended_messages, key=lambda m: m["datetime"]):
-        # Format differently based on whether it's a forwarded message
-        if msg.get("is_forwarded", False):
-            forwarded_source = msg.get("forwarded_from", "Unknown Source")
-            formatted_message = f"[{msg['timestamp']}] {msg['sender_name']} shared content originally by {forwarded_source}: {msg['text']}"
-        else:
-            formatted_message = f"[{msg['timestamp']}] {msg['sender_name']}: {msg['text']}"
-        all_formatted_messages.append(formatted_message)
-    
-    all_messages_text = "\n".join(all_formatted_messages)
-    
+    # Offload the pure-CPU sort/format and regex sweeps to a worker thread so
+    # the event loop stays responsive for concurrent LLM traffic
+    all_messages_text = await asyncio.to_thread(_format_all_messages, extended_messages)
+
     # Create participants list for the prompt
     participant_names = list(participants.keys())
 
-    # Extract trader names from messages
-    trader_names = set()
-    for msg in extended_messages:
-        try:
-            message_text = msg.get("text", "")
-            if "from: 💰" in message_text or "💰" in message_text:
-                # Try multiple approaches to extract trader name
-                if "💰" in message_text and "【" in message_text:
-                    # Extract trader name between 💰 and 【
-                    trader_start = message_text.find("💰") + 1
-                    trader_end = message_text.find("【")
-                    if trader_start > 0 and trader_end > trader_start:
-                        trader_name = message_text[trader_start:trader_end].strip()
-                        if trader_name:  # Only add non-empty names
-                            trader_names.add(trader_name)
-                elif "from: 💰" in message_text:
-                    # Try to extract after "from: 💰"
-                    parts = message_text.split("from: 💰", 1)
-                    if len(parts) > 1 and parts[1].strip():
-                        # Take the first word/segment as the trader name
-                        trader_name = parts[1].split()[0].strip()
-                        if trader_name:
-                            trader_names.add(trader_name)
-        except Exception as e:
-            logger.warning(f"Error extracting trader name: {str(e)}")
-            continue
-    
-    # Convert set to sorted list for consistent ordering
-    trader_names = sorted(list(trader_names))
+    trader_names = await asyncio.to_thread(_extract_trader_names, extended_messages)
 
-    # Load and format the prompt template from file
+    # Load and format the overall prompt template from file; a missing or
+    # broken template degrades to the hardcoded fallback instead of a None
+    # prompt that would fail the call (and cancel the sibling summaries)
+    participants_str = ', '.join(participant_names) if participant_names else 'None'
+    try:
+        prompt_template = get_prompt("overall_prompt", _OVERALL_PROMPT_FALLBACK)
+    except Exception as e:
+        logger.warning(f"Could not load overall prompt template, using fallback: {e}")
+        prompt_template = _OVERALL_PROMPT_FALLBACK
     try:
-        # Get the additional prompt template
-        prompt_template = get_prompt("overall_prompt")
-        
-        participants_str = ', '.join(participant_names) if participant_names else 'None'
         prompt = prompt_template.format(
             participants=participants_str,
             messages=all_messages_text
         )
     except Exception as e:
-        logger.error(f"Error loading or formatting prompt template: {e}")
+        logger.error(f"Error formatting prompt template, using fallback: {e}")
+        prompt = _OVERALL_PROMPT_FALLBACK.format(
+            participants=participants_str,
+            messages=all_messages_text
+        )
 
-    # Make a single API call to generate all summaries
-    logger.info(f"Generating unified summary using {model} model via OpenRouter")
-    
+    # Load the per-participant prompt template (optional; a plain fallback is used if missing)
     try:
-        unified_response = await generate_summary_with_ai(
-            all_messages_text,
-            model,
-            prompt
-        )
-        
-        # Parse the response to extract overall summary and participant summaries
-        overall_summary = None
-        participant_summaries = {}
-        
-        # Extract overall summary
-        if "```overall" in unified_response and "```" in unified_response:
-            overall_start = unified_response.find("```overall") + 10
-            overall_end = unified_response.find("```", overall_start)
-            if overall_end > overall_start:
-                overall_summary = unified_response[overall_start:overall_end].strip()
-        
-        # Extract participant summaries
-        if "```participants" in unified_response and "```" in unified_response:
-            participants_start = unified_response.find("```participants") + 14
-            participants_end = unified_response.find("```", participants_start)
-            if participants_end > participants_start:
-                participants_text = unified_response[participants_start:participants_end].strip()
-                
-                # Process each line to extract participant summaries
-                for line in participants_text.split('\n'):
-                    if ']' in line and '[' in line:
-                        # Extract participant name and summary
-                        participant_start = line.find('[') + 1
-                        participant_end = line.find(']')
-                        if participant_end > participant_start:
-                            participant = line[participant_start:participant_end]
-                            summary_start = line.find(':', participant_end) + 1
-                            if summary_start > 0:
-                                summary = line[summary_start:].strip()
-                                participant_summaries[participant] = summary
-                    elif ':' in line:
-                        # Alternative format without brackets
-                        parts = line.split(':', 1)
-                        if len(parts) == 2:
-                            participant = parts[0].strip()
-                            summary = parts[1].strip()
-                            participant_summaries[participant] = summary
-        
-        # If parsing failed, use the entire response as the overall summary
-        if overall_summary is None:
-            overall_summary = unified_response
-            logger.warning("Failed to parse structured response, using entire response as overall summary")
-        
-        return overall_summary, participant_summaries
-            
+        participant_template = get_prompt("participant_prompt")
     except Exception as e:
-        logger.error(f"Error generating unified summary: {str(e)}")
-        return f"Error generating unified summary: {str(e)}", {}
+        logger.warning(f"Could not load participant prompt template, using fallback: {e}")
+        participant_template = None
+
+    # Build the formatted message text for a single participant
+    def build_participant_text(messages: List[Dict[str, Any]]) -> str:
+        return "\n".join(
+            _format_message(msg)
+            for msg in sorted(messages, key=itemgetter("_ord"), reverse=True)
+        )
+
+    # Build the prompt template for a single participant's summary
+    def build_participant_prompt(participant: str) -> str:
+        if participant_template:
+            try:
+                # Keep the {messages} placeholder for generate_summary_with_ai to fill
+                return participant_template.format(
+                    participant=participant,
+                    messages="{messages}"
+                )
+            except (KeyError, IndexError, ValueError) as e:
+                logger.warning(f"Error formatting participant prompt template: {e}")
+        return (
+            f"Summarize the key points made by {participant} in the following "
+            "Telegram messages. Be concise and factual.\n\n{messages}"
+        )
+
+    # Dispatch one overall call plus one call per participant, bounded by the semaphore
+    semaphore = asyncio.Semaphore(LLM_MAX_ASYNC)
+    logger.info(f"Generating overall and {len(participant_names)} participant summaries using {model} model via OpenRouter")
+
+    # Stream the overall summary to stdout as it is generated, accumulating
+    # the full text so the results dict stays complete
+    async def stream_overall() -> str:
+        chunks = []
+        async with semaphore:
+            async for chunk in openrouter.stream_summary(all_messages_text, model, prompt):
+                sys.stdout.write(chunk)
+                sys.stdout.flush()
+                chunks.append(chunk)
+        sys.stdout.write("\n")
+        return "".join(chunks)
+
+    # Structured concurrency: the TaskGroup cancels all sibling calls as soon
+    # as one fails, so a dead run does not keep burning API quota. Large chats
+    # go through map-reduce; small ones fit in a single prompt; streaming
+    # always uses the single prompt so tokens reach stdout directly
+    participant_tasks = {}
+    try:
+        async with asyncio.TaskGroup() as tg:
+            if stream:
+                overall_task = tg.create_task(stream_overall())
+            elif len(extended_messages) > SUMMARY_CHUNK_SIZE:
+                overall_task = tg.create_task(
+                    _map_reduce_overall(extended_messages, model, semaphore)
+                )
+            else:
+                overall_task = tg.create_task(_bounded(
+                    semaphore,
+                    generate_summary_with_ai, all_messages_text, model, prompt
+                ))
+            for participant, messages in participants.items():
+                participant_tasks[participant] = tg.create_task(_bounded(
+                    semaphore,
+                    generate_summary_with_ai,
+                    build_participant_text(messages),
+                    model,
+                    build_participant_prompt(participant)
+                ))
+    except* Exception as eg:
+        for exc in eg.exceptions:
+            logger.error(f"Error generating summary: {exc}")
+
+    def task_result(task: asyncio.Task, label: str) -> str:
+        if task.cancelled():
+            return f"Error generating {label}: cancelled after a sibling call failed"
+        if task.exception() is not None:
+            return f"Error generating {label}: {task.exception()}"
+        return task.result()
+
+    overall_summary = task_result(overall_task, "overall summary")
+    participant_summaries = {
+        participant: task_result(task, f"summary for {participant}")
+        for participant, task in participant_tasks.items()
+    }
+
+    return overall_summary, participant_summaries
 
 async def main():
     """Parse command line arguments and run the analyzer."""
@@ -373,7 +575,18 @@ async def main():
                         help=f'OpenRouter model to use (default: {DEFAULT_MODEL})')
     parser.add_argument('--unread', action='store_true',
                         help='Fetch only unread messages from the channel')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Skip the on-disk LLM summary cache and always call the API')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream the overall summary to stdout as it is generated '
+                             '(text/markdown output only)')
     args = parser.parse_args()
+
+    if args.no_cache:
+        llm_cache.disable()
+
+    # Streaming interleaves tokens with structured output, so keep JSON buffered
+    stream = args.stream and args.format != 'json'
     
     # Use the default channel ID from config if not specified in args
     chat_id = args.chat_id if args.chat_id is not None else TELEGRAM_CHANNEL_ID
@@ -385,23 +598,27 @@ async def main():
     
     try:
         results = await analyze_messages(
-            TELEGRAM_API_ID, 
-            TELEGRAM_API_HASH, 
-            TELEGRAM_STRING_SESSION, 
+            TELEGRAM_API_ID,
+            TELEGRAM_API_HASH,
+            TELEGRAM_STRING_SESSION,
             chat_id,
             args.users,
             args.num_messages,
             args.model,
-            args.unread
+            args.unread,
+            stream
         )
-        
+
         # Format and output results
         output_text = format_results(results, args.format)
-        write_output(output_text, args.output)
-        
+        await write_output_async(output_text, args.output)
+
     except Exception as e:
         logger.error(f"Error analyzing messages: {e}")
         sys.exit(1)
+    finally:
+        # Release the pooled OpenRouter connections
+        await openrouter.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
@@ -7,7 +7,9 @@ from model.message_analyzer import TelegramMessageAnalyzer
 
 
 from model.openrouter import (
-    generate_summary_with_ai
+    SummaryBatcher,
+    generate_summary_with_ai,
+    stream_summary
 )
 
-__all__ = ['TelegramMessageAnalyzer', 'generate_summary_with_ai'] 
+__all__ = ['TelegramMessageAnalyzer', 'SummaryBatcher', 'generate_summary_with_ai', 'stream_summary']
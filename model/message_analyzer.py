@@ -4,16 +4,41 @@ Telegram Message Analyzer
 This module provides functionality to fetch and analyze Telegram messages.
 """
 
+import asyncio
 import logging
 import atexit
+from collections import OrderedDict
 from typing import Dict, List, Tuple, Optional, Any, Union
 from datetime import datetime, timedelta, timezone
 from telethon.sync import TelegramClient
 from telethon.sessions import StringSession
-from telethon.tl.types import User, Channel, PeerChannel, PeerUser, PeerChat
+from telethon.tl.functions.messages import GetPeerDialogsRequest
+from telethon.tl.functions.users import GetUsersRequest
+from telethon.tl.types import User, Channel, InputPeerUser, PeerChannel, PeerUser, PeerChat
 
 logger = logging.getLogger("TelegramMessageAnalyzer")
 
+# How many messages to buffer before bulk-resolving their unknown senders
+SENDER_BATCH_SIZE = 100
+
+# Maximum number of resolved entities kept in the per-analyzer LRU cache
+ENTITY_CACHE_SIZE = 1024
+
+# Media attributes checked on skipped non-text messages, mapped to the
+# human-readable type used in skip statistics (checked in order)
+_MEDIA_TYPE_NAMES = {
+    'photo': 'photo',
+    'video': 'video',
+    'document': 'document',
+    'sticker': 'sticker',
+    'gif': 'gif',
+    'voice': 'voice message',
+    'audio': 'audio',
+    'poll': 'poll',
+    'contact': 'contact',
+    'location': 'location',
+}
+
 class TelegramMessageAnalyzer:
     """
     Telegram message analyzer that fetches and processes messages.
@@ -41,6 +66,18 @@ class TelegramMessageAnalyzer:
             
         # Register disconnect on program exit to avoid breaking the session
         atexit.register(self._disconnect)
+
+        # Display names of senders resolved via batched GetUsersRequest calls
+        self._sender_names: Dict[int, str] = {}
+
+        # LRU cache of resolved entities keyed by peer id, so repeat senders
+        # and forward sources cost one RPC per unique peer instead of one per
+        # message
+        self._entity_cache: "OrderedDict[str, Any]" = OrderedDict()
+
+        # Computed display names keyed by sender identity; channels with few
+        # authors redo the name-building branch tree only once per author
+        self._name_cache: Dict[Tuple[str, Any], str] = {}
         
     async def __aenter__(self):
         """Async context manager entry"""
@@ -90,9 +127,9 @@ class TelegramMessageAnalyzer:
                 return f"@{sender.username}"
             else:
                 full_name = []
-                if hasattr(sender, 'first_name') and sender.first_name:
+                if getattr(sender, 'first_name', None):
                     full_name.append(sender.first_name)
-                if hasattr(sender, 'last_name') and sender.last_name:
+                if getattr(sender, 'last_name', None):
                     full_name.append(sender.last_name)
                 return " ".join(full_name) if full_name else "Unknown User"
         elif isinstance(sender, Channel):
@@ -111,7 +148,7 @@ class TelegramMessageAnalyzer:
         Returns:
             UTC datetime object representing the lookback point
         """
-        return (datetime.utcnow() - timedelta(seconds=lookback_period)).replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - timedelta(seconds=lookback_period)
     
     def get_peer_from_id(self, chat_id: Union[str, int]) -> Any:
         """
@@ -124,121 +161,343 @@ class TelegramMessageAnalyzer:
             Peer object or original chat_id
         """
         try:
-            # Try to convert to integer
-            chat_id_int = int(chat_id)
-            
+            # Pure-arithmetic normalization; no str round-trips
+            chat_id_int = chat_id if isinstance(chat_id, int) else int(chat_id)
+
             # Handling different types of IDs
             if chat_id_int < 0:
-                # For supergroups and channels
-                if str(chat_id_int).startswith('-100'):
-                    # Strip the -100 prefix to get the actual channel ID
-                    channel_id = int(str(abs(chat_id_int))[2:])
-                    return PeerChannel(channel_id)
-                else:
-                    # For older groups
-                    return PeerChat(abs(chat_id_int))
-            else:
-                # For users
-                return PeerUser(chat_id_int)
+                # Supergroups/channels carry a -100 prefix: -100<channel_id>
+                if chat_id_int <= -1_000_000_000_000:
+                    return PeerChannel(-chat_id_int - 1_000_000_000_000)
+                # For older groups
+                return PeerChat(-chat_id_int)
+            # For users
+            return PeerUser(chat_id_int)
         except ValueError:
             # If it's not an integer, return the string as is
             return chat_id
     
-    async def fetch_messages(self, chat_id: Union[str, int, Any], limit: Optional[int] = None, 
-                             lookback_period: Optional[int] = None) -> Tuple[List[Dict[str, Any]], str]:
+    def _display_name(self, sender: Optional[Union[User, Channel]]) -> str:
         """
-        Fetch messages from the specified chat.
-        
+        Cached wrapper around get_user_display_name keyed by sender identity.
+
+        Args:
+            sender: A Telegram User or Channel object
+
+        Returns:
+            The sender's display name
+        """
+        sender_id = getattr(sender, 'id', None)
+        if sender_id is None:
+            return self.get_user_display_name(sender)
+
+        key = (type(sender).__name__, sender_id)
+        name = self._name_cache.get(key)
+        if name is None:
+            name = self.get_user_display_name(sender)
+            self._name_cache[key] = name
+        return name
+
+    async def _get_entity_cached(self, peer_id: Any) -> Any:
+        """
+        Resolve an entity via client.get_entity with an in-process LRU cache.
+
+        Only successful lookups are cached, so transient errors (e.g.
+        ChannelPrivateError) never leave stale entries behind.
+
+        Args:
+            peer_id: Peer id or Peer object to resolve
+
+        Returns:
+            The resolved entity
+
+        Raises:
+            Whatever client.get_entity raises on failure
+        """
+        # Peer objects are not reliably hashable; their repr is stable
+        key = str(peer_id)
+        if key in self._entity_cache:
+            self._entity_cache.move_to_end(key)
+            return self._entity_cache[key]
+
+        entity = await self.client.get_entity(peer_id)
+        self._entity_cache[key] = entity
+        if len(self._entity_cache) > ENTITY_CACHE_SIZE:
+            self._entity_cache.popitem(last=False)
+        return entity
+
+    async def _resolve_senders_bulk(self, sender_ids) -> Dict[int, str]:
+        """
+        Resolve unknown sender ids with a single batched GetUsersRequest.
+
+        One bulk RPC replaces one get_sender round-trip per unknown user.
+
+        Args:
+            sender_ids: Iterable of numeric user ids to resolve
+
+        Returns:
+            Dictionary mapping user id to display name
+        """
+        resolved: Dict[int, str] = {}
+        input_users = []
+        for sender_id in sender_ids:
+            # Channel/chat senders (anonymous admins, channel posts) are not
+            # users; including one would fail GetUsersRequest for the batch
+            if not isinstance(sender_id, int) or sender_id <= 0:
+                continue
+            try:
+                # Served from the session's entity cache, no network round-trip
+                input_user = await self.client.get_input_entity(sender_id)
+            except Exception:
+                # Unknown to the session cache; the caller falls back per message
+                continue
+            if isinstance(input_user, InputPeerUser):
+                input_users.append(input_user)
+
+        if not input_users:
+            return resolved
+
+        try:
+            users = await self.client(GetUsersRequest(id=input_users))
+            for user in users:
+                resolved[user.id] = self._display_name(user)
+        except Exception as e:
+            self.logger.warning(f"Error bulk-resolving {len(input_users)} senders: {e}")
+        return resolved
+
+    async def get_chat_title(self, chat_id: Union[str, int, Any]) -> str:
+        """
+        Resolve the title of a chat, falling back to the raw id on failure.
+
+        Args:
+            chat_id: Chat ID to resolve
+
+        Returns:
+            The chat title or the stringified chat id
+        """
+        peer = self.get_peer_from_id(chat_id) if isinstance(chat_id, (str, int)) else chat_id
+        try:
+            chat_entity = await self._get_entity_cached(peer)
+            return getattr(chat_entity, 'title', str(chat_id))
+        except Exception as e:
+            self.logger.error(f"Error getting chat entity: {e}")
+            return str(chat_id)
+
+    async def iter_messages(self, chat_id: Union[str, int, Any], limit: Optional[int] = None,
+                            lookback_period: Optional[int] = None):
+        """
+        Stream message dictionaries from the specified chat one at a time.
+
+        Yields messages as they arrive from Telegram instead of materializing
+        the full list, so callers can aggregate in a single pass with bounded
+        memory.
+
         Args:
             chat_id: Chat ID to fetch messages from
             limit: Maximum number of messages to fetch
             lookback_period: Time period in seconds to look back
-            
-        Returns:
-            Tuple of (list of message dictionaries, chat title)
+
+        Yields:
+            Message dictionaries, newest first (oldest first when a
+            lookback_period pins the start server-side)
         """
         self.logger.info(f"Fetching messages from chat")
-        
+
         # Convert chat_id to appropriate peer
         peer = self.get_peer_from_id(chat_id) if isinstance(chat_id, (str, int)) else chat_id
-        
-        # Get chat entity and title
-        try:
-            chat_entity = await self.client.get_entity(peer)
-            chat_title = getattr(chat_entity, 'title', str(chat_id))
-        except Exception as e:
-            self.logger.error(f"Error getting chat entity: {e}")
-            chat_title = str(chat_id)
-        
-        # Determine fetch criteria (limit or time-based)
-        messages = []
+
+        # Determine fetch criteria (limit or time-based). With a lookback
+        # period the boundary is enforced server-side: iterating in reverse
+        # from datetime_from makes Telegram return only newer messages, so no
+        # older history is transferred just to be discarded client-side
         datetime_from = None
         if lookback_period:
             datetime_from = self.get_datetime_from(lookback_period)
             self.logger.info(f"Fetching messages since {datetime_from}")
-        
+            message_iter = self.client.iter_messages(
+                peer, limit=limit, offset_date=datetime_from, reverse=True
+            )
+        else:
+            message_iter = self.client.iter_messages(peer, limit=limit)
+
+        # Arrival counter so consumers can sort chronologically without
+        # comparing datetime strings. _ord is assigned so that sorting it in
+        # descending order always yields oldest-to-newest, regardless of
+        # whether Telegram delivered newest-first or (reverse mode) oldest-first
+        ord_index = 0
+        ord_step = -1 if datetime_from else 1
+
+        # Buffer messages so unknown senders can be resolved with one
+        # batched GetUsersRequest per SENDER_BATCH_SIZE messages instead of
+        # one get_sender round-trip each
+        buffer: List[Any] = []
+        pending_ids = set()
+
+        async def drain() -> List[Dict[str, Any]]:
+            nonlocal ord_index
+            if pending_ids:
+                self._sender_names.update(await self._resolve_senders_bulk(pending_ids))
+                pending_ids.clear()
+
+            drained = []
+            for message in buffer:
+                drained.append(await self._process_message(message, ord_index))
+                ord_index += ord_step
+            buffer.clear()
+            return drained
+
         try:
-            async for message in self.client.iter_messages(peer, limit=limit):
-                # Skip if before lookback period
-                if datetime_from and message.date < datetime_from:
-                    break
-                
+            async for message in message_iter:
                 if not message.text:
                     self.logger.debug("Skipping non-text message")
                     continue
-                
-                # Get message sender
-                try:
-                    sender = await message.get_sender()
-                    sender_name = self.get_user_display_name(sender)
-                    sender_id = sender.id
-                except Exception as e:
-                    self.logger.warning(f"Error getting sender: {e}")
-                    sender_name = "Unknown"
-                    sender_id = None
-                
-                # Check if message is forwarded
-                is_forwarded = False
-                fwd_from_name = None
-                if hasattr(message, 'fwd_from') and message.fwd_from:
-                    is_forwarded = True
-                    # Try to get the original sender name
-                    if hasattr(message.fwd_from, 'from_name') and message.fwd_from.from_name:
-                        fwd_from_name = message.fwd_from.from_name
-                    elif hasattr(message.fwd_from, 'from_id'):
-                        try:
-                            fwd_from_entity = await self.client.get_entity(message.fwd_from.from_id)
-                            fwd_from_name = self.get_user_display_name(fwd_from_entity)
-                        except:
-                            fwd_from_name = "Unknown Source"
-                    else:
-                        fwd_from_name = "Unknown Source"
-                
-                # Create message dictionary
-                msg_dict = {
-                    "id": message.id,
-                    "datetime": message.date.isoformat(),
-                    "timestamp": message.date.strftime("%Y-%m-%d %H:%M:%S"),
-                    "text": message.text,
-                    "sender_name": sender_name,
-                    "sender_id": sender_id,
-                    "is_reply": message.is_reply,
-                    "is_forwarded": is_forwarded,
-                    "forwarded_from": fwd_from_name if is_forwarded else None
-                }
-                
-                # Add reply information if applicable
-                if message.is_reply:
-                    msg_dict["reply_to_msg_id"] = message.reply_to.reply_to_msg_id
-                
-                messages.append(msg_dict)
-            
-            self.logger.info(f"Successfully fetched {len(messages)} messages")
-            return messages, chat_title
-            
+
+                # Senders not shipped with the message batch are queued for
+                # one bulk lookup at drain time
+                if message.sender is None and message.sender_id is not None \
+                        and message.sender_id not in self._sender_names:
+                    pending_ids.add(message.sender_id)
+
+                buffer.append(message)
+                if len(buffer) >= SENDER_BATCH_SIZE:
+                    for msg_dict in await drain():
+                        yield msg_dict
+
+            for msg_dict in await drain():
+                yield msg_dict
+
         except Exception as e:
             self.logger.error(f"Error fetching messages: {e}")
-            return [], chat_title 
+            return
+
+    async def _process_message(self, message: Any, ord_index: int) -> Dict[str, Any]:
+        """
+        Resolve the sender and build the message dictionary for one message.
+
+        Shared by the streaming fetch and the unread path so the processing
+        logic lives in exactly one place.
+
+        Args:
+            message: Telethon Message object
+            ord_index: Arrival-order counter value for this message
+
+        Returns:
+            Message dictionary
+        """
+        sender_name, sender_id = await self._resolve_sender(message)
+        return await self._build_msg_dict(message, ord_index, sender_name, sender_id)
+
+    async def _resolve_sender(self, message: Any) -> Tuple[str, Optional[int]]:
+        """
+        Resolve a message's sender name and id, preferring local data.
+
+        Order: the sender object delivered with the message batch, then the
+        bulk-resolved name cache, then a per-message get_sender round-trip
+        as a last resort.
+
+        Args:
+            message: Telethon Message object
+
+        Returns:
+            Tuple of (sender display name, sender id or None)
+        """
+        sender = message.sender
+        if sender is not None:
+            return self._display_name(sender), message.sender_id
+
+        sender_id = message.sender_id
+        if sender_id is not None and sender_id in self._sender_names:
+            return self._sender_names[sender_id], sender_id
+
+        try:
+            sender = await message.get_sender()
+            name = self._display_name(sender)
+            if sender_id is not None:
+                self._sender_names[sender_id] = name
+            return name, sender_id
+        except Exception as e:
+            self.logger.warning(f"Error getting sender: {e}")
+            return "Unknown", None
+
+    async def _build_msg_dict(self, message: Any, ord_index: int,
+                              sender_name: str, sender_id: Optional[int]) -> Dict[str, Any]:
+        """
+        Build the message dictionary shared by all fetch paths.
+
+        Args:
+            message: Telethon Message object
+            ord_index: Arrival-order counter value for this message
+            sender_name: Resolved sender display name
+            sender_id: Resolved sender id (or None)
+
+        Returns:
+            Message dictionary
+        """
+        # Check if message is forwarded (single getattr per attribute instead
+        # of hasattr followed by a second lookup)
+        fwd = getattr(message, 'fwd_from', None)
+        is_forwarded = fwd is not None
+        fwd_from_name = None
+        if fwd is not None:
+            # Try to get the original sender name
+            from_name = getattr(fwd, 'from_name', None)
+            from_id = getattr(fwd, 'from_id', None)
+            if from_name:
+                fwd_from_name = from_name
+            elif from_id is not None:
+                try:
+                    fwd_from_entity = await self._get_entity_cached(from_id)
+                    fwd_from_name = self._display_name(fwd_from_entity)
+                except:
+                    fwd_from_name = "Unknown Source"
+            else:
+                fwd_from_name = "Unknown Source"
+
+        # One isoformat() call serves both fields: the first 19 characters are
+        # exactly "YYYY-MM-DDTHH:MM:SS", so the display timestamp is a slice
+        # instead of a second strftime pass
+        iso = message.date.isoformat()
+
+        msg_dict = {
+            "id": message.id,
+            "_ord": ord_index,
+            "_sn_norm": sender_name.lower().lstrip('@'),
+            "datetime": iso,
+            "timestamp": iso[:19].replace('T', ' '),
+            "text": message.text,
+            "sender_name": sender_name,
+            "sender_id": sender_id,
+            "is_reply": message.is_reply,
+            "is_forwarded": is_forwarded,
+            "forwarded_from": fwd_from_name if is_forwarded else None
+        }
+
+        # Add reply information if applicable
+        if message.is_reply:
+            msg_dict["reply_to_msg_id"] = message.reply_to.reply_to_msg_id
+
+        return msg_dict
+
+    async def fetch_messages(self, chat_id: Union[str, int, Any], limit: Optional[int] = None,
+                             lookback_period: Optional[int] = None) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Fetch messages from the specified chat as a materialized list.
+
+        Thin wrapper around iter_messages for callers that want the whole
+        window at once.
+
+        Args:
+            chat_id: Chat ID to fetch messages from
+            limit: Maximum number of messages to fetch
+            lookback_period: Time period in seconds to look back
+
+        Returns:
+            Tuple of (list of message dictionaries, chat title)
+        """
+        chat_title = await self.get_chat_title(chat_id)
+        messages = [msg async for msg in self.iter_messages(chat_id, limit, lookback_period)]
+        self.logger.info(f"Successfully fetched {len(messages)} messages")
+        return messages, chat_title
 
     async def get_channel_unread_messages(self, channel_id: Union[str, int]) -> Dict[str, Any]:
         """
@@ -258,23 +517,25 @@ class TelegramMessageAnalyzer:
             
             # Get chat entity and title
             try:
-                chat_entity = await self.client.get_entity(peer)
+                chat_entity = await self._get_entity_cached(peer)
                 chat_title = getattr(chat_entity, 'title', str(channel_id))
             except Exception as e:
                 self.logger.error(f"Error getting chat entity: {e}")
                 chat_title = str(channel_id)
             
-            # Find the dialog with unread messages
+            # Fetch just this peer's dialog instead of paging through the
+            # whole dialog list looking for a match
             dialog = None
             unread_count = 0
-            
-            # Iterate through dialogs to find the one matching our peer
-            async for d in self.client.iter_dialogs():
-                if d.entity.id == getattr(chat_entity, 'id', None):
-                    dialog = d
+
+            try:
+                result = await self.client(GetPeerDialogsRequest(peers=[peer]))
+                if result.dialogs:
+                    dialog = result.dialogs[0]
                     unread_count = dialog.unread_count
-                    break
-            
+            except Exception as e:
+                self.logger.error(f"Error fetching dialog for channel {chat_title}: {e}")
+
             if not dialog:
                 self.logger.warning(f"Could not find dialog for channel {chat_title}")
                 return {
@@ -298,6 +559,7 @@ class TelegramMessageAnalyzer:
             
             # Get unread messages for this dialog
             unread_messages = []
+            text_messages = []
             message_count = 0
             skipped_count = 0
             
@@ -309,8 +571,8 @@ class TelegramMessageAnalyzer:
                 message_count += 1
                 
                 # Check if it's a service message (like user joined, etc.)
-                is_service_message = hasattr(message, 'action') and message.action
-                
+                is_service_message = getattr(message, 'action', None)
+
                 # Skip non-text messages but count their types
                 if is_service_message:
                     # Handle service messages
@@ -320,83 +582,43 @@ class TelegramMessageAnalyzer:
                     skipped_count += 1
                     continue
                 elif not message.text:
-                    # Determine message type
-                    message_type = "unknown"
-                    # Safely check for media attributes
-                    if hasattr(message, 'photo') and message.photo:
-                        message_type = "photo"
-                    elif hasattr(message, 'video') and message.video:
-                        message_type = "video"
-                    elif hasattr(message, 'document') and message.document:
-                        message_type = "document"
-                    elif hasattr(message, 'sticker') and message.sticker:
-                        message_type = "sticker"
-                    elif hasattr(message, 'gif') and message.gif:
-                        message_type = "gif"
-                    elif hasattr(message, 'voice') and message.voice:
-                        message_type = "voice message"
-                    elif hasattr(message, 'audio') and message.audio:
-                        message_type = "audio"
-                    elif hasattr(message, 'poll') and message.poll:
-                        message_type = "poll"
-                    elif hasattr(message, 'contact') and message.contact:
-                        message_type = "contact"
-                    elif hasattr(message, 'location') and message.location:
-                        message_type = "location"
-                    
+                    # Determine message type via the dispatch table: one
+                    # getattr per attribute instead of hasattr + access
+                    message_type = next(
+                        (name for attr, name in _MEDIA_TYPE_NAMES.items()
+                         if getattr(message, attr, None)),
+                        "unknown"
+                    )
+
                     # Update skipped type counter
                     skipped_types[message_type] = skipped_types.get(message_type, 0) + 1
-                    
+
                     self.logger.debug(f"Skipping non-text message (type: {message_type})")
                     skipped_count += 1
                     continue
-                
-                # Get message sender
-                try:
-                    sender = await message.get_sender()
-                    sender_name = self.get_user_display_name(sender)
-                    sender_id = sender.id
-                except Exception as e:
-                    self.logger.warning(f"Error getting sender: {e}")
-                    sender_name = "Unknown"
-                    sender_id = None
-                
-                # Check if message is forwarded
-                is_forwarded = False
-                fwd_from_name = None
-                if hasattr(message, 'fwd_from') and message.fwd_from:
-                    is_forwarded = True
-                    # Try to get the original sender name
-                    if hasattr(message.fwd_from, 'from_name') and message.fwd_from.from_name:
-                        fwd_from_name = message.fwd_from.from_name
-                    elif hasattr(message.fwd_from, 'from_id'):
-                        try:
-                            fwd_from_entity = await self.client.get_entity(message.fwd_from.from_id)
-                            fwd_from_name = self.get_user_display_name(fwd_from_entity)
-                        except:
-                            fwd_from_name = "Unknown Source"
-                    else:
-                        fwd_from_name = "Unknown Source"
-                
-                # Create message dictionary
-                msg_dict = {
-                    "id": message.id,
-                    "datetime": message.date.isoformat(),
-                    "timestamp": message.date.strftime("%Y-%m-%d %H:%M:%S"),
-                    "text": message.text,
-                    "sender_name": sender_name,
-                    "sender_id": sender_id,
-                    "is_reply": message.is_reply,
-                    "is_forwarded": is_forwarded,
-                    "forwarded_from": fwd_from_name if is_forwarded else None
-                }
-                
-                # Add reply information if applicable
-                if message.is_reply:
-                    msg_dict["reply_to_msg_id"] = message.reply_to.reply_to_msg_id
-                
-                unread_messages.append(msg_dict)
-            
+
+                text_messages.append(message)
+
+            # Resolve senders/forward entities for all text messages
+            # concurrently instead of one await per message; the semaphore
+            # keeps us clear of FLOOD_WAIT (_ord: arrival order, newest
+            # first; gaps from dropped messages do not matter for sorting)
+            resolve_semaphore = asyncio.Semaphore(16)
+
+            async def process(ord_index: int, message: Any) -> Dict[str, Any]:
+                async with resolve_semaphore:
+                    return await self._process_message(message, ord_index)
+
+            processed = await asyncio.gather(
+                *(process(idx, message) for idx, message in enumerate(text_messages)),
+                return_exceptions=True
+            )
+            for result in processed:
+                if isinstance(result, Exception):
+                    self.logger.warning(f"Error processing unread message: {result}")
+                    continue
+                unread_messages.append(result)
+
             # Update unread count to reflect actual text messages
             actual_unread_count = len(unread_messages)
             
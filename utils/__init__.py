@@ -22,7 +22,8 @@ from utils.formatters import (
     format_summary_results,
     format_as_markdown,
     format_as_text,
-    write_output
+    write_output,
+    write_output_async
 )
 
 __all__ = [
@@ -44,5 +45,6 @@ __all__ = [
     'format_summary_results',
     'format_as_markdown',
     'format_as_text',
-    'write_output'
+    'write_output',
+    'write_output_async'
 ] 
\ No newline at end of file
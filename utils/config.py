@@ -12,11 +12,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Prefer the C-accelerated loader (5-10x faster) when libyaml is available
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 def load_config() -> Dict[str, Any]:
     """Load configuration from config.yaml file with structured format."""
     try:
         with open('config.yaml', 'r') as file:
-            return yaml.safe_load(file) or {}
+            return yaml.load(file, Loader=_YAML_LOADER) or {}
     except FileNotFoundError:
         print("Warning: config.yaml file not found. Using default values.")
         return {}
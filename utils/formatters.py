@@ -5,13 +5,28 @@ This module contains functions for formatting analysis results in different form
 (text, markdown, JSON) and writing the output to a file or console.
 """
 
+import asyncio
 import json
 import logging
+import re
 from typing import Dict, Any, Optional
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import aiofiles
+except ImportError:  # pragma: no cover - optional speedup
+    aiofiles = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Leading <think>...</think> block some models prepend to their answer
+_THINK_RE = re.compile(r"<think>.*?</think>\s*", re.DOTALL)
+
 def clean_summary(summary: str) -> str:
     """
     Clean up a summary text, handling error messages and ensuring it's displayable.
@@ -29,13 +44,9 @@ def clean_summary(summary: str) -> str:
     if summary.startswith("Error generating"):
         return f"*{summary}*"
     
-    # Remove thinking blocks if they exist
-    if "<think>" in summary and "</think>" in summary:
-        think_start = summary.find("<think>")
-        think_end = summary.find("</think>") + len("</think>")
-        return summary[think_end:].strip()
-    
-    return summary
+    # Remove the thinking block if present; a single C-level regex pass
+    # replaces the two find() scans plus slice arithmetic
+    return _THINK_RE.sub("", summary, count=1).strip()
 
 def format_results(results: Dict[str, Any], format_type: str) -> str:
     """
@@ -57,6 +68,11 @@ def format_results(results: Dict[str, Any], format_type: str) -> str:
     
     # Otherwise format based on the specified format type
     if format_type == 'json':
+        if orjson is not None:
+            # Rust-accelerated serializer; decode since callers expect str
+            return orjson.dumps(
+                results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ).decode('utf-8')
         return json.dumps(results, indent=2)
     elif format_type == 'markdown':
         return format_as_markdown(results)
@@ -73,22 +89,23 @@ def format_summary_results(results: Dict[str, Any]) -> str:
     Returns:
         Markdown-formatted summary
     """
-    output = f"# Telegram Chat Analysis: {results['chat_title']}\n\n"
-    output += f"Messages analyzed: {results['message_count']['with_context']}\n"
-    output += f"Date Range: {results['date_range']['earliest']} to {results['date_range']['latest']}\n\n"
-    
+    # Collect pieces and join once; repeated += on a growing string is
+    # quadratic in the worst case for chats with many participants
+    parts = [
+        f"# Telegram Chat Analysis: {results['chat_title']}\n\n",
+        f"Messages analyzed: {results['message_count']['with_context']}\n",
+        f"Date Range: {results['date_range']['earliest']} to {results['date_range']['latest']}\n\n",
+    ]
+
     # Overall summary - directly use the generated format
-    clean_overall = clean_summary(results["text_summaries"]["overall_summary"])
-    output += clean_overall + "\n\n"
-    
+    parts.append(clean_summary(results["text_summaries"]["overall_summary"]) + "\n\n")
+
     # Participant summaries
-    output += "## Participant Summaries\n\n"
+    parts.append("## Participant Summaries\n\n")
     for participant, summary in results["text_summaries"]["by_participant"].items():
-        clean_participant = clean_summary(summary)
-        output += f"### {participant}\n\n"
-        output += f"{clean_participant}\n\n"
-    
-    return output
+        parts.append(f"### {participant}\n\n{clean_summary(summary)}\n\n")
+
+    return "".join(parts)
 
 def format_as_markdown(results: Dict[str, Any]) -> str:
     """
@@ -100,15 +117,15 @@ def format_as_markdown(results: Dict[str, Any]) -> str:
     Returns:
         Markdown-formatted output
     """
-    output = f"# Telegram Chat Summary: {results['chat_title']}\n\n"
-    
+    parts = [f"# Telegram Chat Summary: {results['chat_title']}\n\n"]
+
     if results["target_users"]:
-        output += f"**Users**: {', '.join(results['target_users'])}\n"
-    
-    output += f"**Messages**: {results['message_count']['filtered']} (with context: {results['message_count']['with_context']})\n"
-    output += f"**Date Range**: {results['date_range']['earliest']} to {results['date_range']['latest']}\n\n"
-    
-    return output
+        parts.append(f"**Users**: {', '.join(results['target_users'])}\n")
+
+    parts.append(f"**Messages**: {results['message_count']['filtered']} (with context: {results['message_count']['with_context']})\n")
+    parts.append(f"**Date Range**: {results['date_range']['earliest']} to {results['date_range']['latest']}\n\n")
+
+    return "".join(parts)
 
 def format_as_text(results: Dict[str, Any]) -> str:
     """
@@ -120,15 +137,15 @@ def format_as_text(results: Dict[str, Any]) -> str:
     Returns:
         Plain text formatted output
     """
-    output = f"Telegram Chat: {results['chat_title']}\n"
-    
+    parts = [f"Telegram Chat: {results['chat_title']}\n"]
+
     if results["target_users"]:
-        output += f"Users: {', '.join(results['target_users'])}\n"
-    
-    output += f"Messages: {results['message_count']['filtered']} (with context: {results['message_count']['with_context']})\n"
-    output += f"Date Range: {results['date_range']['earliest']} to {results['date_range']['latest']}\n\n"
-    
-    return output
+        parts.append(f"Users: {', '.join(results['target_users'])}\n")
+
+    parts.append(f"Messages: {results['message_count']['filtered']} (with context: {results['message_count']['with_context']})\n")
+    parts.append(f"Date Range: {results['date_range']['earliest']} to {results['date_range']['latest']}\n\n")
+
+    return "".join(parts)
 
 def write_output(output_text: str, output_file: Optional[str]) -> None:
     """
@@ -140,7 +157,8 @@ def write_output(output_text: str, output_file: Optional[str]) -> None:
     """
     if output_file:
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
+            # Large buffer so big summaries go out in few syscalls
+            with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
                 f.write(output_text)
             logger.info(f"Results saved to {output_file}")
         except IOError as e:
@@ -150,4 +168,32 @@ def write_output(output_text: str, output_file: Optional[str]) -> None:
     else:
         # Just log the output instead of printing to console
         logger.info(output_text)
-        return output_text 
\ No newline at end of file
+        return output_text
+
+async def write_output_async(output_text: str, output_file: Optional[str]) -> None:
+    """
+    Async variant of write_output that keeps the event loop unblocked.
+
+    Uses aiofiles when installed; otherwise offloads the blocking write
+    to a worker thread.
+
+    Args:
+        output_text: The formatted output text to write
+        output_file: Optional file path to write to (None to print to console)
+    """
+    if not output_file:
+        logger.info(output_text)
+        return
+
+    if aiofiles is None:
+        await asyncio.to_thread(write_output, output_text, output_file)
+        return
+
+    try:
+        async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
+            await f.write(output_text)
+        logger.info(f"Results saved to {output_file}")
+    except IOError as e:
+        logger.error(f"Error writing to file {output_file}: {e}")
+        # Fall back to console output
+        logger.info(output_text)
@@ -1,8 +1,10 @@
 import logging
+import os
+import re
+from pathlib import Path
 from telethon.sync import TelegramClient
 from telethon.sessions import StringSession
 import utils.config as config
-import asyncio
 import sys
 
 # Configure logging
@@ -12,21 +14,29 @@ logging.basicConfig(level=logging.INFO)
 SECONDS_PER_HOUR = 3600
 SECONDS_PER_MINUTE = 60
 
+# Existing session assignment line in .env (replaced on regeneration)
+_SESSION_LINE_RE = re.compile(r'(?m)^TELEGRAM_STRING_SESSION=.*\n?')
+
+# Wait duration in Telegram's FLOOD_WAIT error message
+_FLOOD_RE = re.compile(r'of (\d+) seconds')
+
 # Load config values
 CONFIG = config.CONFIG
 
-# Telegram client configuration from consts.yaml
-SYSTEM_VERSION = CONFIG.get('telegram_client', {}).get('system_version')
-APP_VERSION = CONFIG.get('telegram_client', {}).get('app_version')
-DEVICE_MODEL = CONFIG.get('telegram_client', {}).get('device_model')
-SYSTEM_LANG_CODE = CONFIG.get('telegram_client', {}).get('system_lang_code')
-LANG_CODE = CONFIG.get('telegram_client', {}).get('lang_code')
+# Telegram client configuration from consts.yaml; resolve the section
+# once instead of allocating a fresh empty dict per key
+_TG = CONFIG.get('telegram_client') or {}
+SYSTEM_VERSION = _TG.get('system_version')
+APP_VERSION = _TG.get('app_version')
+DEVICE_MODEL = _TG.get('device_model')
+SYSTEM_LANG_CODE = _TG.get('system_lang_code')
+LANG_CODE = _TG.get('lang_code')
 
 # Telegram API credentials from environment variables
 API_ID = config.TELEGRAM_API_ID
 API_HASH = config.TELEGRAM_API_HASH
 
-async def generate_session():
+def generate_session():
     try:
         # Create client with StringSession
         client = TelegramClient(
@@ -40,8 +50,8 @@ async def generate_session():
             lang_code=LANG_CODE
         )
 
-        # Start client
-        await client.start()
+        # Start client (telethon.sync runs the coroutine for us)
+        client.start()
 
         # Get the session string
         session_string = client.session.save()
@@ -49,32 +59,33 @@ async def generate_session():
         print(session_string)
         print("\nStore this string safely!\n")
 
-        await client.disconnect()
+        client.disconnect()
         return session_string
 
     except Exception as e:
         print(f"\nError: {str(e)}")
-        if "FLOOD_WAIT" in str(e):
-            wait_time = int(str(e).split('of ')[1].split(' seconds')[0])
-            hours = wait_time // SECONDS_PER_HOUR
-            minutes = (wait_time % SECONDS_PER_HOUR) // SECONDS_PER_MINUTE
+        m = _FLOOD_RE.search(str(e)) if "FLOOD_WAIT" in str(e) else None
+        if m:
+            wait_time = int(m.group(1))
+            hours, minutes = divmod(wait_time // SECONDS_PER_MINUTE, SECONDS_PER_MINUTE)
             print(f"\nTelegram requires waiting {hours} hours and {minutes} minutes before requesting another code.")
             print("Please try again after this time period.")
         return None
 
 if __name__ == "__main__":
     try:
-        session_string = asyncio.run(generate_session())
+        session_string = generate_session()
         if session_string:
-            # Save to .env file
-            with open('.env', 'r') as f:
-                env_lines = f.readlines()
+            # Save to .env: one read, strip the old assignment in a single
+            # regex pass, then write atomically so a crash mid-write can't
+            # leave a truncated .env behind
+            env_path = Path('.env')
+            data = _SESSION_LINE_RE.sub('', env_path.read_text())
+            data = data.rstrip() + f'\nTELEGRAM_STRING_SESSION="{session_string}"\n'
 
-            with open('.env', 'w') as f:
-                for line in env_lines:
-                    if not line.startswith('TELEGRAM_STRING_SESSION='):
-                        f.write(line)
-                f.write(f'\nTELEGRAM_STRING_SESSION="{session_string}"')
+            tmp_path = Path('.env.tmp')
+            tmp_path.write_text(data)
+            os.replace(tmp_path, env_path)
 
     except KeyboardInterrupt:
         print("\nOperation cancelled by user")
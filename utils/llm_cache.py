@@ -0,0 +1,99 @@
+"""
+LLM Summary Cache
+
+This module provides a small on-disk cache for LLM responses keyed by content
+hash, so re-running the tool over an identical message window skips the
+expensive API call.
+"""
+
+import hashlib
+import logging
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger("TelegramMessageAnalyzer")
+
+# Directory holding one file per cached response
+CACHE_DIR = Path(".llm_cache")
+
+# Global switch so the CLI can opt out with --no-cache
+_enabled = True
+
+
+def disable() -> None:
+    """Disable the cache for the rest of the process (e.g. --no-cache)."""
+    global _enabled
+    _enabled = False
+
+
+def make_key(*parts: str) -> str:
+    """
+    Build a cache key from the strings that define a request.
+
+    Args:
+        parts: Request-defining strings (model, prompt, message text, ...)
+
+    Returns:
+        Hex digest usable as a filename
+    """
+    joined = "|".join(str(p) for p in parts)
+    return hashlib.blake2b(joined.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def get(key: str) -> Optional[str]:
+    """
+    Look up a cached response.
+
+    Args:
+        key: Cache key from make_key
+
+    Returns:
+        The cached response text, or None on a miss
+    """
+    if not _enabled:
+        return None
+    try:
+        return (CACHE_DIR / f"{key}.txt").read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.warning(f"Error reading LLM cache entry {key}: {e}")
+        return None
+
+
+def put(key: str, value: str) -> None:
+    """
+    Store a response in the cache.
+
+    Args:
+        key: Cache key from make_key
+        value: Response text to store
+    """
+    if not _enabled:
+        return
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        (CACHE_DIR / f"{key}.txt").write_text(value, encoding="utf-8")
+    except OSError as e:
+        logger.warning(f"Error writing LLM cache entry {key}: {e}")
+
+
+async def cached_call(key: str, coro_factory: Callable[[], Awaitable[str]]) -> str:
+    """
+    Return the cached response for key, or run the coroutine and cache it.
+
+    Args:
+        key: Cache key from make_key
+        coro_factory: Zero-argument callable returning the coroutine to run
+            on a cache miss
+
+    Returns:
+        The cached or freshly generated response
+    """
+    cached = get(key)
+    if cached is not None:
+        logger.info(f"LLM cache hit for {key}")
+        return cached
+    result = await coro_factory()
+    put(key, result)
+    return result
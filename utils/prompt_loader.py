@@ -1,9 +1,22 @@
+import functools
 import logging
+import os
+import sys
 from pathlib import Path
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Resolved once at import; prompt lookups only pay a dict lookup
+_PROMPT_DIR = Path(__file__).resolve().parent.parent / "data" / "prompts"
+
+# Prompt names are a small closed set, so scan the directory once and
+# map each name to its file path (empty when the directory is absent)
+_PROMPT_PATHS = {p.stem: str(p) for p in _PROMPT_DIR.glob("*.md")}
+
+# Prompt names already warned about, so repeated misses stay silent
+_warned_missing = set()
+
 def load_markdown_file(filename: str) -> Optional[str]:
     """
     Load content from a Markdown file.
@@ -15,37 +28,95 @@ def load_markdown_file(filename: str) -> Optional[str]:
         File content as string or None if loading fails
     """
     try:
-        with open(filename, 'r', encoding='utf-8') as file:
-            return file.read()
+        # Bytes read + one straight-through decode; text mode would run
+        # the incremental decoder and newline translation for nothing
+        return Path(filename).read_bytes().decode('utf-8')
+    except Exception as e:
+        logger.error("Error loading markdown file %s: %s", filename, e)
+        return None
+
+@functools.lru_cache(maxsize=32)
+def _read_prompt_file(md_path_str: str, mtime_ns: int = 0) -> Optional[str]:
+    """
+    Read a prompt file from disk, cached per process.
+
+    mtime_ns is part of the cache key: when a prompt is edited under a
+    running process the key changes and the file is re-read, while the
+    unchanged case stays a dict lookup. The stale entry ages out of the
+    LRU naturally. Use _read_prompt_file.cache_clear() in tests to force
+    a reload.
+
+    Args:
+        md_path_str: Path to the prompt's Markdown file
+        mtime_ns: The file's st_mtime_ns, used only as a cache-busting key
+
+    Returns:
+        Prompt template string or None if the file is missing/unreadable
+    """
+    try:
+        # Same bytes-then-decode fast path as load_markdown_file; intern
+        # reasonable-sized templates so the same content loaded under two
+        # names shares one string and compares by pointer downstream
+        text = Path(md_path_str).read_bytes().decode('utf-8')
+        return sys.intern(text) if len(text) < 100_000 else text
+    except FileNotFoundError:
+        return None
     except Exception as e:
-        logger.error(f"Error loading markdown file {filename}: {e}")
+        logger.error("Error loading markdown file %s: %s", md_path_str, e)
         return None
 
+def _preload_prompts() -> None:
+    """
+    Warm the prompt cache at import so no request pays a cold read.
+
+    Opt-in via PROMPTS_EAGER=1: long-lived service processes trade a bit
+    of startup time for flat steady-state latency; one-shot CLI runs
+    keep the lazy default.
+    """
+    total_bytes = 0
+    for md_path in _PROMPT_PATHS.values():
+        try:
+            text = _read_prompt_file(md_path, os.stat(md_path).st_mtime_ns)
+        except OSError:
+            continue
+        if text:
+            total_bytes += len(text.encode('utf-8'))
+    logger.info("Preloaded %d prompts (%d bytes)", len(_PROMPT_PATHS), total_bytes)
+
+if os.getenv('PROMPTS_EAGER') == '1':
+    _preload_prompts()
+
 def get_prompt(prompt_name: str, default_prompt: Optional[str] = None) -> str:
     """
     Get a prompt template by name, looking for .md files.
-    
+
+    The file read is memoized, so repeated lookups (one per summary call)
+    cost a dict lookup instead of a disk hit.
+
     Args:
         prompt_name: Name of the prompt (without extension)
         default_prompt: Fallback prompt to use if file loading fails
-        
+
     Returns:
         Prompt template string
     """
-    # Get the base directory of the project
-    base_dir = Path(__file__).parent.parent
-    prompt_dir = base_dir / "data" / "prompts"
-    
-    # Check for Markdown file
-    md_path = prompt_dir / f"{prompt_name}.md"
-    if md_path.exists():
-        result = load_markdown_file(str(md_path))
-        if result:
-            return result
-    
-    # Fallback to default prompt
+    md_path = _PROMPT_PATHS.get(prompt_name)
+    result = None
+    if md_path:
+        try:
+            # One stat (microseconds) keys the cache; edits between calls
+            # change mtime_ns and trigger a re-read
+            result = _read_prompt_file(md_path, os.stat(md_path).st_mtime_ns)
+        except OSError:
+            pass
+    if result:
+        return result
+
+    # Fallback to default prompt (warn once per name, not per call)
     if default_prompt:
-        logger.warning(f"Could not load prompt '{prompt_name}' from file. Using default prompt.")
+        if prompt_name not in _warned_missing:
+            _warned_missing.add(prompt_name)
+            logger.warning("Could not load prompt '%s' from file. Using default prompt.", prompt_name)
         return default_prompt
     else:
         raise ValueError(f"Prompt '{prompt_name}' not found and no default provided.") 
\ No newline at end of file